@@ -0,0 +1,159 @@
+"""
+Response Cache Helpers
+
+Two-level cache for read-heavy catalog endpoints: a small process-local
+L1 in front of Redis. Entries hold the already-encoded JSON body so a hit
+skips both the database and serialization.
+"""
+
+import functools
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from responses import dumps
+
+# Load environment variables from .env file
+load_dotenv()
+
+CACHE_TTL = 300  # seconds, Redis
+LOCAL_TTL = 5  # seconds, process-local L1
+LOCAL_MAX_ENTRIES = 256
+STREAM_MAX_CACHED_BYTES = 1 << 20  # larger streamed bodies are not cached
+REDIS_TIMEOUT = 0.1  # seconds; a slow Redis falls through to the database
+KEY_NAMESPACE = "laser-shop:"  # keeps keys apart from other apps on a shared Redis
+
+redis_client = None
+
+redis_url = os.getenv("REDIS_URL")
+
+if redis_url:
+    redis_client = aioredis.from_url(
+        redis_url, socket_connect_timeout=REDIS_TIMEOUT, socket_timeout=REDIS_TIMEOUT
+    )
+
+# key -> (expires_at, body), kept in least-recently-used-first order
+_local: Dict[str, Tuple[float, bytes]] = {}
+
+EMPTY_LIST = b"[]"
+
+
+def _make_key(prefix: str, params: dict) -> str:
+    parts = [f"{k}={v}" for k, v in sorted(params.items()) if v is not None]
+    key = f"{KEY_NAMESPACE}{prefix}"
+    return f"{key}:{'&'.join(parts)}" if parts else key
+
+
+def _local_get(key: str) -> Optional[bytes]:
+    entry = _local.get(key)
+    if entry is None:
+        return None
+    del _local[key]
+    if entry[0] < time.monotonic():
+        return None
+    _local[key] = entry  # re-insert as most recently used
+    return entry[1]
+
+
+def _local_set(key: str, body: bytes):
+    _local.pop(key, None)
+    if len(_local) >= LOCAL_MAX_ENTRIES:
+        # Evict only the least recently used entry
+        del _local[next(iter(_local))]
+    _local[key] = (time.monotonic() + LOCAL_TTL, body)
+
+
+async def get_cached(key: str) -> Optional[bytes]:
+    """Look up an encoded body in L1, then Redis"""
+    body = _local_get(key)
+    if body is not None or redis_client is None:
+        return body
+    try:
+        body = await redis_client.get(key)
+    except RedisError:
+        return None
+    if body is not None:
+        _local_set(key, body)
+    return body
+
+
+async def set_cached(key: str, body: bytes, ttl: int = CACHE_TTL):
+    """Store an encoded body in L1 and Redis"""
+    _local_set(key, body)
+    if redis_client is None:
+        return
+    try:
+        await redis_client.set(key, body, ex=ttl)
+    except RedisError:
+        pass
+
+
+async def invalidate(*prefixes: str):
+    """Drop every cached entry of the given endpoint prefixes, with any params"""
+    bases = [_make_key(prefix, {}) for prefix in prefixes]
+    scoped = tuple(f"{base}:" for base in bases)
+    for key in [k for k in _local if k in bases or k.startswith(scoped)]:
+        _local.pop(key, None)
+    if redis_client is None:
+        return
+    try:
+        for base in bases:
+            keys = [base] + [k async for k in redis_client.scan_iter(match=f"{base}:*")]
+            await redis_client.delete(*keys)
+    except RedisError:
+        pass
+
+
+async def _tee_into_cache(key: str, first: bytes, chunks, ttl: int, cache_empty: bool):
+    # Copy into one buffer and give up once it exceeds the limit, so a large
+    # stream keeps its bounded memory footprint instead of being cached
+    buf = bytearray(first)
+    yield first
+    async for chunk in chunks:
+        if buf is not None:
+            buf += chunk
+            if len(buf) > STREAM_MAX_CACHED_BYTES:
+                buf = None
+        yield chunk
+    if buf is not None and (cache_empty or buf != EMPTY_LIST):
+        await set_cached(key, bytes(buf), ttl)
+
+
+def cached(prefix: str, ttl: int = CACHE_TTL, cache_empty: bool = True):
+    """Cache an async JSON endpoint's encoded response, keyed by prefix + query params
+
+    Endpoints may return either a JSON-serializable value or an async
+    iterator of encoded chunks; the latter is streamed to the client on a
+    miss and cached once complete if it stays under STREAM_MAX_CACHED_BYTES.
+    Iterators must yield at least one chunk. With cache_empty=False an empty list is
+    never stored, so arbitrary query values cannot fill the cache.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = _make_key(prefix, kwargs)
+            body = await get_cached(key)
+            if body is None:
+                result = await func(*args, **kwargs)
+                if hasattr(result, "__aiter__"):
+                    # Pull the first chunk before the 200 goes out so database
+                    # errors still produce a normal error response
+                    chunks = result.__aiter__()
+                    first = await chunks.__anext__()
+                    return StreamingResponse(
+                        _tee_into_cache(key, first, chunks, ttl, cache_empty), media_type="application/json"
+                    )
+                body = dumps(result)
+                if cache_empty or body != EMPTY_LIST:
+                    await set_cached(key, body, ttl)
+            return Response(content=body, media_type="application/json")
+
+        return wrapper
+
+    return decorator
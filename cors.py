@@ -0,0 +1,87 @@
+"""
+CORS Middleware
+
+Lightweight ASGI CORS handling. The allowlist and every static header
+are resolved to bytes once at import; preflight requests are answered
+here without reaching the app.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Comma-separated origins; "*" allows any origin (echoed back so
+# credentialed requests keep working)
+cors_origins = os.getenv("CORS_ORIGINS", "*")
+
+_ALLOWED_ORIGINS = frozenset(o.strip().encode("latin-1") for o in cors_origins.split(",") if o.strip())
+_ALLOW_ANY_ORIGIN = b"*" in _ALLOWED_ORIGINS
+
+_COMMON_HEADERS = (
+    (b"access-control-allow-credentials", b"true"),
+    (b"vary", b"Origin"),
+)
+_PREFLIGHT_HEADERS = _COMMON_HEADERS + (
+    (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+    (b"access-control-max-age", b"600"),
+)
+
+
+class CORSMiddleware:
+    """Pure ASGI replacement for Starlette's CORSMiddleware"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+        allowed = _ALLOW_ANY_ORIGIN or origin in _ALLOWED_ORIGINS
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(send, origin if allowed else None, request_headers)
+            return
+
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"access-control-allow-origin", origin),
+                    *_COMMON_HEADERS,
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    @staticmethod
+    async def _preflight(send, origin, request_headers):
+        if origin is None:
+            await send({"type": "http.response.start", "status": 400, "headers": [(b"content-length", b"0")]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers = [(b"access-control-allow-origin", origin), *_PREFLIGHT_HEADERS]
+        if request_headers is not None:
+            headers.append((b"access-control-allow-headers", request_headers))
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
@@ -5,11 +5,12 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import Iterable, Mapping, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -22,12 +23,17 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    _client = AsyncIOMotorClient(database_url)
     db = _client[database_name]
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
+    doc = await insert_document(collection_name, data)
+    return doc['id']
+
+async def insert_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamp, return it as stored with _id exposed as id"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
 
@@ -40,16 +46,53 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
-    return str(result.inserted_id)
+    result = await db[collection_name].insert_one(data_dict)
+    data_dict.pop('_id', None)
+    data_dict['id'] = str(result.inserted_id)
+    return data_dict
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def create_documents(collection_name: str, items: Iterable[Union[BaseModel, Mapping]]):
+    """Insert many documents with timestamps in one bulk write, return inserted count"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    docs = []
+    for data in items:
+        data_dict = data.model_dump() if isinstance(data, BaseModel) else dict(data)
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        docs.append(data_dict)
+    if not docs:
+        return 0
+
+    # Unordered so a single duplicate does not abort the rest of the batch
+    try:
+        result = await db[collection_name].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        return e.details["nInserted"]
+    return len(result.inserted_ids)
+
+def iter_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None):
+    """Return an async cursor over documents, with _id exposed as id
+
+    projection limits the returned fields (inclusion only); id is always kept.
+    """
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
+    pipeline = [{"$match": filter_dict or {}}]
     if limit:
-        cursor = cursor.limit(limit)
+        pipeline.append({"$limit": limit})
+    # Rename and stringify _id server-side so Python never sees the ObjectId
+    id_field = {"id": {"$toString": "$_id"}}
+    if projection:
+        pipeline.append({"$project": {"_id": 0, **projection, **id_field}})
+    else:
+        pipeline += [{"$addFields": id_field}, {"$project": {"_id": 0}}]
     
-    return list(cursor)
+    return db[collection_name].aggregate(pipeline)
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None):
+    """Get documents from collection as a list, see iter_documents"""
+    return await iter_documents(collection_name, filter_dict, limit, projection).to_list(length=None)
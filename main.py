@@ -1,177 +1,276 @@
+import asyncio
+import email.message
+import logging
 import os
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Any, List, Mapping, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
 from bson import ObjectId
-
-from database import db, create_document, get_documents
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, OperationFailure
+
+from cache import cached, invalidate
+from cors import CORSMiddleware
+from responses import MongoJSONResponse, dumps, iter_json_array
+from database import db, create_documents, get_documents, insert_document, iter_documents
 from schemas import User, Product, Category, Portfolio, Order, OrderItem
 
-app = FastAPI(title="Laser Engraving Shop API")
+# Environment resolved once at import, never on the request path
+_HAS_DATABASE_URL = bool(os.getenv("DATABASE_URL"))
+_HAS_DATABASE_NAME = bool(os.getenv("DATABASE_NAME"))
+_PORT = int(os.getenv("PORT", 8000))
+_WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+logger = logging.getLogger(__name__)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+_INDEXES = (
+    ("user", "email", True),
+    ("category", "slug", True),
+    ("product", "category", False),
+    ("order", "user_email", False),
 )
 
 
-@app.get("/")
-def read_root():
-    return {"message": "Laser Engraving Shop Backend"}
+async def create_indexes():
+    # Failures are logged, not raised: the app must still serve and /test must
+    # still be able to report an unreachable or inconsistent database
+    for collection, field, unique in _INDEXES:
+        try:
+            await db[collection].create_index(field, unique=unique)
+        except ConnectionFailure as e:
+            logger.warning("Skipping index creation, database unreachable: %s", e)
+            return
+        except OperationFailure as e:
+            # e.g. DuplicateKeyError when existing documents violate a unique index
+            logger.warning("Could not create index on %s.%s: %s", collection, field, e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Run in the background so an unreachable database does not delay startup
+    task = asyncio.create_task(create_indexes()) if db is not None else None
+    yield
+    if task is not None:
+        task.cancel()
+
+
+app = FastAPI(title="Laser Engraving Shop API", default_response_class=MongoJSONResponse, lifespan=lifespan)
+
+app.add_middleware(CORSMiddleware)
+
+
+_ROOT_BYTES = dumps({"message": "Laser Engraving Shop Backend"})
+
 
+@app.get("/", response_model=None)
+async def read_root():
+    return Response(_ROOT_BYTES, media_type="application/json")
 
-# Utility for ObjectId conversion
-class Doc(BaseModel):
-    id: str
 
+# Seed payloads, built once at import and read-only
+_SEED_CATEGORIES: Tuple[Mapping[str, Any], ...] = (
+    MappingProxyType({"name": "Phone Cases", "slug": "phone-cases", "description": "Precision-engraved cases"}),
+    MappingProxyType({"name": "Wood Gifts", "slug": "wood-gifts", "description": "Maple, walnut, oak"}),
+    MappingProxyType({"name": "Metal Cards", "slug": "metal-cards", "description": "Stainless, brass"}),
+)
 
-def serialize(doc):
-    if not doc:
-        return doc
-    doc["id"] = str(doc.pop("_id"))
-    return doc
+_SEED_PRODUCTS: Tuple[Mapping[str, Any], ...] = (
+    MappingProxyType({"title": "Walnut Coaster Set", "description": "Laser-engraved logo on walnut.", "price": 39.0, "category": "wood-gifts", "in_stock": True, "image_url": "https://images.unsplash.com/photo-1555041469-a586c61ea9bc?w=800"}),
+    MappingProxyType({"title": "Aluminum Business Card", "description": "Ultra-thin anodized metal.", "price": 2.5, "category": "metal-cards", "in_stock": True, "image_url": "https://images.unsplash.com/photo-1581291519195-ef11498d1cf5?w=800"}),
+    MappingProxyType({"title": "Matte Black Phone Case", "description": "Custom pattern engraving.", "price": 29.0, "category": "phone-cases", "in_stock": True, "image_url": "https://images.unsplash.com/photo-1511707171634-5f897ff02aa9?w=800"}),
+)
+
+_SEED_PORTFOLIO: Tuple[Mapping[str, Any], ...] = (
+    MappingProxyType({"title": "Startup Swag", "description": "Branded coasters for offsite.", "image_url": "https://images.unsplash.com/photo-1616628188502-521331aac402?w=1200", "client_name": "Veridian"}),
+    MappingProxyType({"title": "Wedding Keepsake", "description": "Names and vows engraved on oak.", "image_url": "https://images.unsplash.com/photo-1523419409543-8c1a8ef328d2?w=1200", "client_name": "Eden & Kai"}),
+)
 
 
 # Seed minimal categories/products/portfolio if collections are empty
-@app.post("/seed")
-def seed_data():
+@app.post("/seed", response_model=None)
+async def seed_data():
     if db is None:
         raise HTTPException(status_code=500, detail="Database not configured")
 
     created = {"categories": 0, "products": 0, "portfolio": 0}
 
-    if db["category"].count_documents({}) == 0:
-        for c in [
-            {"name": "Phone Cases", "slug": "phone-cases", "description": "Precision-engraved cases"},
-            {"name": "Wood Gifts", "slug": "wood-gifts", "description": "Maple, walnut, oak"},
-            {"name": "Metal Cards", "slug": "metal-cards", "description": "Stainless, brass"},
-        ]:
-            create_document("category", c)
-            created["categories"] += 1
-
-    if db["product"].count_documents({}) == 0:
-        for p in [
-            {"title": "Walnut Coaster Set", "description": "Laser-engraved logo on walnut.", "price": 39.0, "category": "wood-gifts", "in_stock": True, "image_url": "https://images.unsplash.com/photo-1555041469-a586c61ea9bc?w=800"},
-            {"title": "Aluminum Business Card", "description": "Ultra-thin anodized metal.", "price": 2.5, "category": "metal-cards", "in_stock": True, "image_url": "https://images.unsplash.com/photo-1581291519195-ef11498d1cf5?w=800"},
-            {"title": "Matte Black Phone Case", "description": "Custom pattern engraving.", "price": 29.0, "category": "phone-cases", "in_stock": True, "image_url": "https://images.unsplash.com/photo-1511707171634-5f897ff02aa9?w=800"},
-        ]:
-            create_document("product", p)
-            created["products"] += 1
-
-    if db["portfolio"].count_documents({}) == 0:
-        for s in [
-            {"title": "Startup Swag", "description": "Branded coasters for offsite.", "image_url": "https://images.unsplash.com/photo-1616628188502-521331aac402?w=1200", "client_name": "Veridian"},
-            {"title": "Wedding Keepsake", "description": "Names and vows engraved on oak.", "image_url": "https://images.unsplash.com/photo-1523419409543-8c1a8ef328d2?w=1200", "client_name": "Eden & Kai"},
-        ]:
-            create_document("portfolio", s)
-            created["portfolio"] += 1
+    if await db["category"].find_one({}, {"_id": 1}) is None:
+        created["categories"] = await create_documents("category", _SEED_CATEGORIES)
+
+    if await db["product"].find_one({}, {"_id": 1}) is None:
+        created["products"] = await create_documents("product", _SEED_PRODUCTS)
 
+    if await db["portfolio"].find_one({}, {"_id": 1}) is None:
+        created["portfolio"] = await create_documents("portfolio", _SEED_PORTFOLIO)
+
+    await invalidate("categories", "products", "portfolio")
     return {"status": "ok", "created": created}
 
 
 # Public endpoints
-@app.get("/categories")
-def list_categories():
-    cats = [serialize(c) for c in get_documents("category")]
-    return cats
 
+# Only the schema fields are returned; bookkeeping fields stay in Mongo
+_CATEGORY_FIELDS = dict.fromkeys(Category.model_fields, 1)
+_PRODUCT_FIELDS = dict.fromkeys(Product.model_fields, 1)
+_PORTFOLIO_FIELDS = dict.fromkeys(Portfolio.model_fields, 1)
+
+
+@app.get("/categories", response_model=None)
+@cached("categories")
+async def list_categories():
+    return await get_documents("category", projection=_CATEGORY_FIELDS)
 
-@app.get("/products")
-def list_products(category: Optional[str] = None):
+
+@app.get("/products", response_model=None)
+@cached("products", cache_empty=False)
+async def list_products(category: Optional[str] = None):
     filt = {"category": category} if category else {}
-    prods = [serialize(p) for p in get_documents("product", filt)]
-    return prods
+    # Stream straight off the cursor instead of materializing the catalog
+    return iter_json_array(iter_documents("product", filt, projection=_PRODUCT_FIELDS))
 
 
-@app.get("/portfolio")
-def list_portfolio():
-    items = [serialize(p) for p in get_documents("portfolio")]
-    return items
+@app.get("/portfolio", response_model=None)
+@cached("portfolio")
+async def list_portfolio():
+    return await get_documents("portfolio", projection=_PORTFOLIO_FIELDS)
 
 
 class LoginRequest(BaseModel):
+    model_config = ConfigDict(strict=True, extra="ignore")
+
     email: str
     name: Optional[str] = None
 
 
-@app.post("/login")
-def login(payload: LoginRequest):
-    # Simple email-based account creation/login
-    existing = db["user"].find_one({"email": payload.email}) if db else None
-    if existing:
-        return serialize(existing)
-    user = User(name=payload.name or payload.email.split("@")[0], email=payload.email)
-    uid = create_document("user", user)
-    created = db["user"].find_one({"_id": ObjectId(uid)})
-    return serialize(created)
+# Compiled once; login validates the raw body itself rather than via
+# FastAPI's body dependency
+_LOGIN_ADAPTER = TypeAdapter(LoginRequest)
 
 
-class CartItem(BaseModel):
-    product_id: str
-    qty: int = 1
+def _is_json_request(request: Request) -> bool:
+    # Mirrors FastAPI: no Content-Type, application/json or application/*+json
+    content_type = request.headers.get("content-type")
+    if not content_type:
+        return True
+    message = email.message.Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+@app.post(
+    "/login",
+    response_model=None,
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": LoginRequest.model_json_schema()}}}},
+)
+async def login(request: Request):
+    body = await request.body()
+    try:
+        if not body:
+            # FastAPI reports an absent body as a missing required field
+            raise ValidationError.from_exception_data("LoginRequest", [{"type": "missing", "loc": (), "input": None}])
+        if _is_json_request(request):
+            payload = _LOGIN_ADAPTER.validate_json(body)
+        else:
+            # Same outcome as FastAPI's body handling: non-JSON bodies are
+            # validated as raw bytes and rejected with 422
+            payload = _LOGIN_ADAPTER.validate_python(body)
+    except ValidationError as e:
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors()])
+    # Simple email-based account creation/login in a single upsert
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not configured")
+    # Payload is already validated by LoginRequest; skip re-validation
+    user = User.model_construct(name=payload.name or payload.email.split("@")[0], email=payload.email)
+    now = datetime.now(timezone.utc)
+    try:
+        doc = await db["user"].find_one_and_update(
+            {"email": payload.email},
+            {"$setOnInsert": {**user.model_dump(), "created_at": now, "updated_at": now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # A concurrent login inserted the same email first
+        doc = await db["user"].find_one({"email": payload.email})
+    doc["id"] = doc.pop("_id")
+    return MongoJSONResponse(doc)
+
+
+class CartItem(OrderItem):
+    """Cart line; shares OrderItem's fields so it can be stored as-is"""
+    model_config = ConfigDict(strict=True)
 
 
 class CreateOrderRequest(BaseModel):
+    model_config = ConfigDict(strict=True, extra="ignore")
+
     user_email: str
     items: List[CartItem]
     notes: Optional[str] = None
     contact_phone: Optional[str] = None
 
 
-@app.post("/order")
-def create_order(payload: CreateOrderRequest):
-    # Validate products exist
-    for it in payload.items:
-        prod = db["product"].find_one({"_id": ObjectId(it.product_id)})
-        if not prod:
-            raise HTTPException(status_code=404, detail=f"Product not found: {it.product_id}")
-
-    order = Order(
+@app.post("/order", response_model=None)
+async def create_order(payload: CreateOrderRequest):
+    # Validate products exist with a single round-trip. Parse and dedupe in one
+    # sweep, keyed by ObjectId since it accepts hex in either case
+    try:
+        requested = {ObjectId(i.product_id): i.product_id for i in payload.items}
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    found = {d["_id"] async for d in db["product"].find({"_id": {"$in": list(requested)}}, {"_id": 1})}
+    missing = sorted(pid for oid, pid in requested.items() if oid not in found)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Product not found: {', '.join(missing)}")
+
+    # Fields come from the validated CreateOrderRequest; skip re-validation
+    order = Order.model_construct(
         user_email=payload.user_email,
-        items=[OrderItem(product_id=i.product_id, qty=i.qty) for i in payload.items],
+        items=payload.items,
         notes=payload.notes,
         contact_phone=payload.contact_phone,
         status="pending",
     )
-    oid = create_document("order", order)
-    created = db["order"].find_one({"_id": ObjectId(oid)})
-    return serialize(created)
-
-
-@app.get("/test")
-def test_database():
-    response = {
-        "backend": "✅ Running",
-        "database": "❌ Not Available",
-        "database_url": None,
-        "database_name": None,
-        "connection_status": "Not Connected",
-        "collections": []
-    }
+    # The inserted dict is already the stored document; no need to read it back
+    return MongoJSONResponse(await insert_document("order", order))
+
+
+# /test fields that only depend on configuration, resolved once
+_TEST_BASE = {
+    "backend": "✅ Running",
+    "database": "✅ Available" if db is not None else "⚠️  Available but not initialized",
+    "database_url": ("✅ Set" if _HAS_DATABASE_URL else "❌ Not Set") if db is not None else None,
+    "database_name": ("✅ Set" if _HAS_DATABASE_NAME else "❌ Not Set") if db is not None else None,
+    "connection_status": "Not Connected",
+    "collections": [],
+}
+_TEST_UNAVAILABLE_BYTES = dumps(_TEST_BASE)
+
+
+@app.get("/test", response_model=None)
+async def test_database():
+    if db is None:
+        return Response(_TEST_UNAVAILABLE_BYTES, media_type="application/json")
+    response = dict(_TEST_BASE)
     try:
-        if db is not None:
-            response["database"] = "✅ Available"
-            response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
-            response["database_name"] = "✅ Set" if os.getenv("DATABASE_NAME") else "❌ Not Set"
-            try:
-                collections = db.list_collection_names()
-                response["collections"] = collections[:10]
-                response["database"] = "✅ Connected & Working"
-                response["connection_status"] = "Connected"
-            except Exception as e:
-                response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
-        else:
-            response["database"] = "⚠️  Available but not initialized"
+        collections = await db.list_collection_names()
+        response["collections"] = collections[:10]
+        response["database"] = "✅ Connected & Working"
+        response["connection_status"] = "Connected"
     except Exception as e:
-        response["database"] = f"❌ Error: {str(e)[:50]}"
-    return response
+        response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
+    return Response(dumps(response), media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
-    port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # An import string is required for uvicorn to spawn multiple workers
+    uvicorn.run("main:app", host="0.0.0.0", port=_PORT, loop="uvloop", http="httptools", workers=_WEB_CONCURRENCY)
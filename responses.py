@@ -0,0 +1,49 @@
+"""
+JSON Response Helpers
+
+orjson-based encoding that understands Mongo types, so documents can be
+returned without a per-document conversion pass.
+"""
+
+from typing import Any, AsyncIterable, AsyncIterator
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+
+
+def _default(obj: Any):
+    """orjson fallback for types it does not encode natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes, rendering ObjectId as its hex string"""
+    return orjson.dumps(content, default=_default)
+
+
+async def iter_json_array(docs: AsyncIterable[Any]) -> AsyncIterator[bytes]:
+    """Encode documents as a JSON array one element at a time
+
+    The first document is fetched before anything is yielded, so pulling
+    the first chunk surfaces connection and query errors.
+    """
+    it = docs.__aiter__()
+    try:
+        first = await it.__anext__()
+    except StopAsyncIteration:
+        yield b"[]"
+        return
+    yield b"[" + dumps(first)
+    async for doc in it:
+        yield b"," + dumps(doc)
+    yield b"]"
+
+
+class MongoJSONResponse(ORJSONResponse):
+    """ORJSONResponse that can render raw Mongo documents"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -4,11 +4,13 @@ Database Schemas for Laser Engraving Shop
 Each Pydantic model represents a MongoDB collection.
 Collection name is the lowercase of the class name.
 """
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, Optional, List
 
 
 class User(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     name: str = Field(..., description="Full name")
     email: str = Field(..., description="Email address")
     avatar_url: Optional[str] = Field(None, description="Profile image URL")
@@ -37,11 +39,16 @@ class Portfolio(BaseModel):
 
 
 class OrderItem(BaseModel):
-    product_id: str = Field(..., description="Product ObjectId as string")
-    qty: int = Field(1, ge=1, description="Quantity")
+    # Validated per cart line on every order; keep the core schema minimal
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    product_id: str
+    qty: Annotated[int, Field(ge=1)] = 1
 
 
 class Order(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     user_email: str = Field(..., description="Customer email")
     items: List[OrderItem] = Field(default_factory=list)
     status: str = Field("pending", description="Order status")